@@ -2,14 +2,40 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import tkinter.ttk as ttk
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import os
+import pickle
+import hashlib
+import functools
+import tempfile
+import time
 import re
 import zipfile
-import xml.etree.ElementTree as ET
+try:
+    from lxml import etree as ET  # C parser, same iterparse/tag API
+except ImportError:
+    import xml.etree.ElementTree as ET
 import openpyxl
+from openpyxl.utils.cell import coordinate_to_tuple
 from datetime import datetime
-from pdfminer.high_level import extract_pages
-from pdfminer.layout import LTTextContainer
+try:
+    from python_calamine import CalamineWorkbook  # Rust-backed xlsx reader
+except ImportError:
+    CalamineWorkbook = None
+try:
+    import pymupdf as fitz  # PyMuPDF: much faster text + bbox extraction
+except ImportError:
+    try:
+        import fitz  # Older PyMuPDF releases only provide the fitz name
+    except ImportError:
+        fitz = None
+if fitz is None:
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.pdfdevice import PDFTextDevice
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdffont import PDFUnicodeNotDefined
+    from pdfminer.utils import apply_matrix_pt
 
 # ==============================================================================
 # PART 1: CONSTANTS & BACKEND LOGIC
@@ -29,69 +55,191 @@ SPECTRO_MAPPINGS = [
     ['S10', 'E23']   # Element 8
 ]
 
+# Microstructure labels and which occurrence in the DOCX carries the value
+MICRO_LABELS = {
+    "Graphite Nodularity": "last", "Nodular Particles per mm²": "last",
+    "Graphite Size": "last", "Graphite Form": "last",
+    "Graphite Fraction": "last", "Ferrite / Pearlite Ratio": "first"
+}
+
+# Mechanical Mapping: extracted value -> Dest_Cell
+MICRO_MAPPINGS = {
+    "Graphite Nodularity": 'T36', "Nodular Particles per mm²": 'T37',
+    "Graphite Size": 'T38', "Graphite Form": 'T39',
+    "Graphite Fraction": 'T40', "Ferrite / Pearlite Ratio": 'T41'
+}
+TENSILE_CELLS = ['E26', 'E27', 'E28']  # Tensile, Yield, Elongation
+HARDNESS_CELLS = ['E29', 'E30']        # First two hardness readings
+
+# Same mappings as 1-based (row, col) tuples, parsed once here instead of on every cell access
+_SPECTRO_RC = [(coordinate_to_tuple(s), coordinate_to_tuple(d)) for s, d in SPECTRO_MAPPINGS]
+_SPECTRO_MAX_ROW = max(r for (r, _), _ in _SPECTRO_RC)
+_SPECTRO_MAX_COL = max(c for (_, c), _ in _SPECTRO_RC)
+_MICRO_LABELS_LOWER = [(label, label.lower(), pref) for label, pref in MICRO_LABELS.items()]
+_MICRO_RC = {label: coordinate_to_tuple(cell) for label, cell in MICRO_MAPPINGS.items()}
+_TENSILE_RC = [coordinate_to_tuple(cell) for cell in TENSILE_CELLS]
+_HARDNESS_RC = [coordinate_to_tuple(cell) for cell in HARDNESS_CELLS]
+
+# Precompiled patterns used by the extractors
+_RE_NUM = re.compile(r"([\d\.]+)")
+_RE_FP_RATIO = re.compile(r"(\d+\.?\d*%\s*/\s*\d+\.?\d*%)")
+_RE_HBW = re.compile(r"([\d\.]+)\s*HBW")
+_RE_TRAIL_PUNCT = re.compile(r"[\s\.\,]+$")
+_RE_PDF_KEYWORDS = re.compile(r"Tensile Strength|Yield Strength|Elongation|Hardness|HBW|Mpa|%")
+
 class LogHelper:
     """Helper to safely write to the GUI log window from a thread."""
+    MAX_BATCH = 200  # Lines written per drain() call
+
     def __init__(self, text_widget, root):
         self.widget = text_widget
         self.root = root
+        self.queue = queue.Queue()
 
     def log(self, message, level="INFO"):
         timestamp = datetime.now().strftime("%H:%M:%S")
         formatted_msg = f"[{timestamp}] [{level}] {message}"
         
-        # Schedule the UI update on the main thread
-        self.root.after(0, lambda: self._write(formatted_msg, level))
+        # Queue it; the main thread picks it up on its next drain()
+        self.queue.put((formatted_msg, level))
 
-    def _write(self, message, level):
-        self.widget.configure(state='normal')
-        
-        # Add color tags based on level
-        tag = "info"
-        if level == "ERROR": tag = "error"
-        elif level == "SUCCESS": tag = "success"
-        elif level == "DATA": tag = "data"
+    def drain(self):
+        """Write pending lines to the widget. Must run on the Tk main thread."""
+        batch = []
+        try:
+            while len(batch) < self.MAX_BATCH:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        if batch: self._write(batch)
+
+    def _write(self, batch):
+        # One insert for the whole batch: text, tag, text, tag, ...
+        args = []
+        for message, level in batch:
+            # Add color tags based on level
+            tag = "info"
+            if level == "ERROR": tag = "error"
+            elif level == "SUCCESS": tag = "success"
+            elif level == "DATA": tag = "data"
+            args += [message + "\n", tag]
         
-        self.widget.insert(tk.END, message + "\n", tag)
+        self.widget.insert(tk.END, *args)
         self.widget.see(tk.END)
-        self.widget.configure(state='disabled')
 
-# --- Logic: Docx Extraction ---
-def extract_micro_data(docx_path, logger):
-    results = {}
-    if not docx_path or not os.path.exists(docx_path):
-        return results
+# --- Logic: Parse Cache ---
+# Parsed source files are memoized on disk so re-runs against unchanged inputs skip the parse
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".mtc_cache")
+CACHE_MAX_AGE = 30 * 24 * 3600  # Entries unused for this many seconds are pruned
+_CACHE_VERSION = 6  # Bump when a cached parser's return format changes
 
+def _prune_cache():
+    cutoff = time.time() - CACHE_MAX_AGE
+    try:
+        for entry in os.scandir(CACHE_DIR):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+    except OSError:
+        pass # Pruning is best effort
+
+def _disk_cache(backend):
+    """Memoize func(path, ...) on disk, one entry per func name, backend and file path.
+
+    An entry stores the file's (mtime, size) and is only served while they still match;
+    a changed file overwrites its old entry. Other arguments (logger, labels) are not
+    part of the key. Empty results are not stored, so a failed read is retried next
+    time. Cache raw parses only, so label matching still runs on every call.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(path, *args, **kwargs):
+            try:
+                st = os.stat(path)
+            except (OSError, TypeError, ValueError):
+                return func(path, *args, **kwargs)
+
+            stamp = (st.st_mtime_ns, st.st_size)
+            key = f"{_CACHE_VERSION}|{func.__name__}|{backend}|{os.path.abspath(path)}"
+            cache_file = os.path.join(CACHE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".pkl")
+            logger = next((a for a in args if isinstance(a, LogHelper)), None)
+            try:
+                with open(cache_file, "rb") as fp:
+                    cached_stamp, result = pickle.load(fp)
+            except Exception:
+                cached_stamp = None # Miss or unreadable entry: parse again
+            if cached_stamp == stamp:
+                try:
+                    os.utime(cache_file) # Still in use: keep it out of the prune
+                except OSError:
+                    pass
+                if logger:
+                    logger.log(f"Using cached parse of {os.path.basename(path)}")
+                return result
+
+            result = func(path, *args, **kwargs)
+            if not result:
+                return result
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                fd, tmp_file = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as fp:
+                        pickle.dump((stamp, result), fp)
+                    os.replace(tmp_file, cache_file)
+                except Exception:
+                    os.remove(tmp_file)
+                    raise
+                _prune_cache()
+            except Exception:
+                pass # Caching is best effort
+            return result
+        return wrapper
+    return decorator
+
+# --- Logic: Docx Extraction ---
+@_disk_cache(backend=ET.__name__)
+def _read_docx_chunks(docx_path, logger):
+    """Non-empty <w:t> texts of the DOCX body, in document order."""
     logger.log(f"Scanning Microstructure (DOCX): {os.path.basename(docx_path)}")
-    
+
+    all_text_chunks = []
     try:
+        # Stream the XML and drop each element once read, instead of building the full tree
         with zipfile.ZipFile(docx_path) as docx:
-            xml_content = docx.read('word/document.xml')
-            tree = ET.fromstring(xml_content)
+            with docx.open('word/document.xml') as fp:
+                for _, elem in ET.iterparse(fp, events=('end',)):
+                    if elem.tag.endswith('}t') and elem.text and elem.text.strip():
+                        all_text_chunks.append(elem.text.strip())
+                    elem.clear()
     except Exception as e:
-        logger.log(f"Failed to read DOCX: {e}", "ERROR")
+        raise RuntimeError(f"Failed to read DOCX {os.path.basename(docx_path)}: {e}") from e
+    return all_text_chunks
+
+def extract_micro_data(docx_path, logger):
+    """Microstructure values by label. Raises if the DOCX is missing or unreadable."""
+    results = {}
+    if not docx_path:
         return results
+    if not os.path.exists(docx_path):
+        raise FileNotFoundError(f"Microstructure DOCX not found: {docx_path}")
 
-    all_text_chunks = []
-    for elem in tree.iter():
-        if elem.tag.endswith('}t') and elem.text and elem.text.strip():
-            all_text_chunks.append(elem.text.strip())
-
-    target_labels = {
-        "Graphite Nodularity": "last", "Nodular Particles per mm²": "last",
-        "Graphite Size": "last", "Graphite Form": "last",
-        "Graphite Fraction": "last", "Ferrite / Pearlite Ratio": "first"
-    }
+    all_text_chunks = _read_docx_chunks(docx_path, logger)
+
+    # Lowercase once, not once per label
+    chunks_lower = [c.lower() for c in all_text_chunks]
     
-    for label, preference in target_labels.items():
+    for label, label_lower, preference in _MICRO_LABELS_LOWER:
         target_index = -1
         
         # Find index
         if preference == "last":
-            for i, chunk in enumerate(all_text_chunks):
-                if label.lower() in chunk.lower(): target_index = i
+            # Walk backwards so the first hit is the last occurrence
+            for i in range(len(chunks_lower) - 1, -1, -1):
+                if label_lower in chunks_lower[i]:
+                    target_index = i; break
         else: # first
-            for i, chunk in enumerate(all_text_chunks):
-                if label.lower() in chunk.lower(): 
+            for i, chunk in enumerate(chunks_lower):
+                if label_lower in chunk: 
                     target_index = i; break
 
         if target_index != -1:
@@ -109,7 +257,7 @@ def extract_micro_data(docx_path, logger):
                      if "(" in n and ")" in n: found_value = n; break
             elif label == "Ferrite / Pearlite Ratio":
                 combined = "".join(neighbors[0:3])
-                match = re.search(r"(\d+\.?\d*%\s*/\s*\d+\.?\d*%)", combined)
+                match = _RE_FP_RATIO.search(combined)
                 if match: found_value = match.group(1)
             elif label == "Graphite Nodularity":
                 for n in neighbors:
@@ -117,7 +265,7 @@ def extract_micro_data(docx_path, logger):
             else:
                 for n in neighbors:
                     if any(c.isdigit() for c in n) and not n.endswith('%'):
-                        found_value = re.sub(r'[\s\.\,]+$', '', n); break
+                        found_value = _RE_TRAIL_PUNCT.sub('', n); break
             
             if found_value:
                 results[label] = found_value
@@ -125,54 +273,213 @@ def extract_micro_data(docx_path, logger):
     return results
 
 # --- Logic: PDF Helpers ---
-def find_value_neighbor(elements, label_text, required_keyword="Mpa"):
-    label_bbox = None
-    for element in elements:
-        if label_text in element.get_text():
-            label_bbox = element.bbox; break    
-    if not label_bbox: return None
-
-    lx0, ly0, lx1, ly1 = label_bbox
+# Every label/value keyword the tensile and hardness scans look for
+PDF_KEYWORDS = ("Tensile Strength", "Yield Strength", "Elongation", "Hardness", "HBW", "Mpa", "%")
+
+class PDFScan:
+    """Page 0 (text, bbox) blocks bucketed by PDF_KEYWORDS, with a y-band index per bucket."""
+    BAND = 5  # Band height in PDF points
+
+    def __init__(self):
+        self.buckets = {key: [] for key in PDF_KEYWORDS}
+        self.bands = {key: {} for key in PDF_KEYWORDS}  # keyword -> band -> bucket indices
+
+    def __bool__(self):
+        return any(self.buckets.values())
+
+    def add(self, key, text, bbox):
+        entries = self.buckets[key]
+        # Register the block in every band its y-range touches
+        for band in range(int(bbox[1] // self.BAND), int(bbox[3] // self.BAND) + 1):
+            self.bands[key].setdefault(band, []).append(len(entries))
+        entries.append((text, bbox))
+
+    def near(self, key, y0, y1):
+        """Blocks of a bucket that may overlap y0..y1, in document order."""
+        bands = self.bands[key]
+        hits = set()
+        for band in range(int(y0 // self.BAND), int(y1 // self.BAND) + 1):
+            hits.update(bands.get(band, ()))
+        entries = self.buckets[key]
+        return [entries[i] for i in sorted(hits)]
+
+def find_value_neighbor(scan, label_text, required_keyword="Mpa"):
+    labels = scan.buckets.get(label_text)
+    if not labels: return None
+
+    lx0, ly0, lx1, ly1 = labels[0][1]
     closest_distance = 9999
     best_text = None
     
-    for element in elements:
-        text = element.get_text().strip()
-        ex0, ey0, ex1, ey1 = element.bbox
+    # Only blocks containing the keyword, in bands level with the label, can hold the value
+    for text, (ex0, ey0, ex1, ey1) in scan.near(required_keyword, ly0 - 2, ly1 + 2):
         if label_text in text: continue
         # Simple proximity check
-        if (ey0 < ly1 + 2) and (ey1 > ly0 - 2) and (ex0 >= lx0 - 5) and (required_keyword in text):
+        if (ey0 < ly1 + 2) and (ey1 > ly0 - 2) and (ex0 >= lx0 - 5):
             distance = ex0 - lx1
             if distance < closest_distance:
                 closest_distance = distance
                 best_text = text
     
     if best_text:
-        match = re.search(r"([\d\.]+)", best_text)
+        match = _RE_NUM.search(best_text)
         return match.group(1) if match else best_text
     return None
 
-def extract_pdf_elements(pdf_path, logger):
-    elements = []
-    if not pdf_path or not os.path.exists(pdf_path): return elements
+def _extract_fitz_blocks(pdf_path):
+    # PyMuPDF blocks join everything on one baseline (label + value), so take
+    # individual spans and rebuild pdfminer-style boxes with _merge_runs
+    runs = []
+    with fitz.open(pdf_path) as doc:
+        page = doc.load_page(0)
+        height = page.rect.height
+        for block in page.get_text("dict")["blocks"]:
+            if block.get("type") != 0: continue # skip image blocks
+            for line in block["lines"]:
+                for span in line["spans"]:
+                    if not span["text"].strip(): continue
+                    # Glyph box like pdfminer's LTChar: baseline + descent, one font size tall,
+                    # with y flipped to pdfminer's bottom-up axis
+                    y0 = height - span["origin"][1] + span["descender"] * span["size"]
+                    runs.append((span["text"], (span["bbox"][0], y0, span["bbox"][2], y0 + span["size"])))
+    return _merge_runs(runs)
+
+if fitz is None:
+    class _TextRunDevice(PDFTextDevice):
+        """pdfminer device that keeps each show-text operation as one (text, bbox) run.
+
+        No LTChar objects or LAParams layout analysis; see _merge_runs for line joining.
+        """
+        def __init__(self, rsrcmgr):
+            super().__init__(rsrcmgr)
+            self.runs = []
+            self._chars = []
+            self._box = None
+
+        def render_string(self, *args):
+            self._chars, self._box = [], None
+            super().render_string(*args)
+            if self._box is not None:
+                self.runs.append(("".join(self._chars), self._box))
+
+        def render_char(self, matrix, font, fontsize, scaling, rise, cid, *args):
+            try:
+                text = font.to_unichr(cid)
+            except PDFUnicodeNotDefined:
+                text = ""
+            adv = font.char_width(cid) * fontsize * scaling
+            descent = font.get_descent() * fontsize
+            ax, ay = apply_matrix_pt(matrix, (0, descent + rise))
+            bx, by = apply_matrix_pt(matrix, (adv, descent + rise + fontsize))
+            x0, y0, x1, y1 = min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)
+            gap = x0 - self._box[2] if self._box is not None else 0
+            if gap > y1 - y0:
+                # Wider than the ~1 char height char_margin used by _merge_runs: a TJ jump
+                # to another column (label -> value), so start a separate run
+                self.runs.append(("".join(self._chars), self._box))
+                self._chars, self._box = [], None
+            if self._box is None:
+                self._box = (x0, y0, x1, y1)
+            else:
+                # Smaller TJ kerning gaps stand in for spaces between words
+                if gap > 0.15 * (y1 - y0) and text != " ": self._chars.append(" ")
+                px0, py0, px1, py1 = self._box
+                self._box = (min(px0, x0), min(py0, y0), max(px1, x1), max(py1, y1))
+            self._chars.append(text)
+            return adv
+
+LINE_MARGIN = 0.5  # pdfminer's default line_margin, as a fraction of line height
+
+def _merge_runs(runs):
+    """Rebuild pdfminer-style text boxes from raw show-text runs.
+
+    Consecutive runs on one baseline less than ~1 char height apart form a line
+    (pdfminer's char_margin). Lines stacked within LINE_MARGIN x height of each other,
+    of similar height and sharing a left, right or centre edge, form one box
+    (pdfminer's line_margin), so "Hardness" over "190 HBW" stays a single block.
+    """
+    lines = []
+    for text, (x0, y0, x1, y1) in runs:
+        if lines:
+            ptext, (px0, py0, px1, py1) = lines[-1]
+            h = max(y1 - y0, py1 - py0)
+            gap = x0 - px1
+            if abs(y0 - py0) < 0.5 * h and -0.5 * h <= gap <= h:
+                sep = " " if gap > 0.15 * h else ""
+                lines[-1] = (ptext + sep + text, (min(px0, x0), min(py0, y0), max(px1, x1), max(py1, y1)))
+                continue
+        lines.append((text, (x0, y0, x1, y1)))
+    lines = [(text.strip(), bbox) for text, bbox in lines if text.strip()]
+
+    # Union-find over lines that pdfminer would treat as neighbours
+    parent = list(range(len(lines)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, (_, (ax0, ay0, ax1, ay1)) in enumerate(lines):
+        for j in range(i + 1, len(lines)):
+            bx0, by0, bx1, by1 = lines[j][1]
+            d = LINE_MARGIN * max(ay1 - ay0, by1 - by0)
+            if by1 < ay0 - d or by0 > ay1 + d or bx1 < ax0 or bx0 > ax1: continue
+            if abs((by1 - by0) - (ay1 - ay0)) > d: continue
+            if abs(bx0 - ax0) <= d or abs(bx1 - ax1) <= d or abs((bx0 + bx1) - (ax0 + ax1)) / 2 <= d:
+                parent[find(j)] = find(i)
+
+    groups = {}
+    for i in range(len(lines)):
+        groups.setdefault(find(i), []).append(lines[i])
+    boxes = []
+    for members in groups.values():
+        members.sort(key=lambda line: -line[1][3]) # Top to bottom, like LTTextBox
+        boxes.append(("\n".join(text for text, _ in members),
+                      (min(b[0] for _, b in members), min(b[1] for _, b in members),
+                       max(b[2] for _, b in members), max(b[3] for _, b in members))))
+    return boxes
+
+def _extract_pdfminer_runs(pdf_path):
+    rsrcmgr = PDFResourceManager(caching=True)
+    device = _TextRunDevice(rsrcmgr)
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    try:
+        with open(pdf_path, "rb") as fp:
+            for page in PDFPage.get_pages(fp, pagenos=[0], maxpages=1):
+                interpreter.process_page(page)
+    finally:
+        device.close()
+    return _merge_runs(device.runs)
+
+def extract_pdf_elements(pdf_path):
+    """Return page 0 text blocks as (stripped_text, bbox) tuples. Raises if the PDF can't be read."""
+    if not pdf_path: return []
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
     try:
-        for page_layout in extract_pages(pdf_path, page_numbers=[0]):
-            for element in page_layout:
-                if isinstance(element, LTTextContainer): elements.append(element)
+        if fitz is not None:
+            return _extract_fitz_blocks(pdf_path)
+        return _extract_pdfminer_runs(pdf_path)
     except Exception as e:
-        logger.log(f"Error reading PDF {os.path.basename(pdf_path)}: {e}", "ERROR")
-    return elements
+        raise RuntimeError(f"Error reading PDF {os.path.basename(pdf_path)}: {e}") from e
+
+@_disk_cache(backend="fitz" if fitz is not None else "pdfminer")
+def scan_pdf(pdf_path, logger, kind="PDF"):
+    """Parse page 0 once into a PDFScan."""
+    scan = PDFScan()
+    if not pdf_path: return scan
+    logger.log(f"Scanning {kind} (PDF): {os.path.basename(pdf_path)}")
+    for text, bbox in extract_pdf_elements(pdf_path):
+        # A block can carry several keywords (e.g. "Hardness 190 HBW")
+        for key in set(_RE_PDF_KEYWORDS.findall(text)):
+            scan.add(key, text, bbox)
+    return scan
 
 # --- Logic: Tensile PDF ---
-def process_tensile(pdf_path, logger):
-    if not pdf_path: return (None, None, None)
-    logger.log(f"Scanning Tensile (PDF): {os.path.basename(pdf_path)}")
-    elements = extract_pdf_elements(pdf_path, logger)
-    if not elements: return (None, None, None)
-
-    val_tensile = find_value_neighbor(elements, "Tensile Strength", "Mpa")
-    val_yield = find_value_neighbor(elements, "Yield Strength", "Mpa")
-    val_elong = find_value_neighbor(elements, "Elongation", "%")
+def process_tensile(scan, logger):
+    val_tensile = find_value_neighbor(scan, "Tensile Strength", "Mpa")
+    val_yield = find_value_neighbor(scan, "Yield Strength", "Mpa")
+    val_elong = find_value_neighbor(scan, "Elongation", "%")
 
     if val_tensile: logger.log(f"  > Tensile: {val_tensile}", "DATA")
     if val_yield: logger.log(f"  > Yield: {val_yield}", "DATA")
@@ -181,38 +488,33 @@ def process_tensile(pdf_path, logger):
     return val_tensile, val_yield, val_elong
 
 # --- Logic: Hardness PDF ---
-def process_hardness(pdf_path, logger):
-    if not pdf_path: return []
-    logger.log(f"Scanning Hardness (PDF): {os.path.basename(pdf_path)}")
-    elements = extract_pdf_elements(pdf_path, logger)
-    if not elements: return []
-
-    hardness_labels = [e for e in elements if "Hardness" in e.get_text()]
+def process_hardness(scan, logger):
     # Sort top to bottom
-    hardness_labels.sort(key=lambda x: x.bbox[3], reverse=True)
+    hardness_labels = sorted(scan.buckets["Hardness"], key=lambda x: x[1][3], reverse=True)
+    
+    # HBW blocks that carry a reading, matched once rather than once per label
+    hbw_elems = []
+    for etext, ebbox in scan.buckets["HBW"]:
+        nm = _RE_HBW.search(etext)
+        if nm: hbw_elems.append((nm.group(1), ebbox))
     
     results = []
-    for label in hardness_labels:
+    for label_text, label_bbox in hardness_labels:
         found = None
         # Try finding inside label text first
-        match_inside = re.search(r"([\d\.]+)\s*HBW", label.get_text())
+        match_inside = _RE_HBW.search(label_text)
         if match_inside: 
             found = match_inside.group(1)
         else:
             # Look for neighbor to the right
-            lx0, ly0, lx1, ly1 = label.bbox
+            lx0, ly0, lx1, ly1 = label_bbox
             closest = 9999
-            for element in elements:
-                etext = element.get_text().strip()
-                if "HBW" not in etext: continue
-                ex0, ey0, ex1, ey1 = element.bbox
+            for value, (ex0, ey0, ex1, ey1) in hbw_elems:
                 if (ey0 < ly1 + 5) and (ey1 > ly0 - 5) and (ex0 > lx0):
                     dist = ex0 - lx1
                     if dist < closest:
-                        nm = re.search(r"([\d\.]+)\s*HBW", etext)
-                        if nm:
-                            closest = dist
-                            found = nm.group(1)
+                        closest = dist
+                        found = value
         if found:
             results.append(found)
             logger.log(f"  > Hardness Found: {found}", "DATA")
@@ -220,6 +522,46 @@ def process_hardness(pdf_path, logger):
             
     return results
 
+# --- Logic: Spectro XLSX ---
+def _active_sheet_index(xlsx_path):
+    """Index of the tab the workbook was saved on (workbookView activeTab), as wb.active uses."""
+    with zipfile.ZipFile(xlsx_path) as xlsx:
+        with xlsx.open('xl/workbook.xml') as fp:
+            for _, elem in ET.iterparse(fp, events=('end',)):
+                if elem.tag.endswith('}workbookView'):
+                    return int(elem.get('activeTab', 0))
+    return 0
+
+@_disk_cache(backend="calamine" if CalamineWorkbook is not None else "openpyxl")
+def read_spectro_values(spectro_file):
+    """Return the SPECTRO_MAPPINGS source cell values from the active sheet, in mapping order."""
+    # Both backends read the same tab: the one the workbook was saved on
+    sheet_idx = _active_sheet_index(spectro_file)
+    if CalamineWorkbook is not None:
+        wb_src = CalamineWorkbook.from_path(spectro_file)
+        if sheet_idx >= len(wb_src.sheet_names): sheet_idx = 0
+        sheet = wb_src.get_sheet_by_index(sheet_idx)
+        # Keep leading empty rows/cols so indices match the sheet; calamine reports blanks as ""
+        rows = [[None if v == "" else v for v in row]
+                for row in sheet.to_python(skip_empty_area=False, nrows=_SPECTRO_MAX_ROW)]
+    else:
+        # Streaming reader: one pass over the top rows instead of loading the whole sheet
+        wb_src = openpyxl.load_workbook(spectro_file, data_only=True, read_only=True, keep_links=False)
+        try:
+            # sheetnames keeps workbook order (chartsheets included), matching activeTab
+            if sheet_idx >= len(wb_src.sheetnames): sheet_idx = 0
+            ws_src = wb_src[wb_src.sheetnames[sheet_idx]]
+            rows = list(ws_src.iter_rows(min_row=1, max_row=_SPECTRO_MAX_ROW,
+                                         max_col=_SPECTRO_MAX_COL, values_only=True))
+        finally:
+            wb_src.close()
+
+    values = []
+    for (r, c), _ in _SPECTRO_RC:
+        row = rows[r - 1] if r <= len(rows) else ()
+        values.append(row[c - 1] if c <= len(row) else None)
+    return values
+
 
 # ==============================================================================
 # PART 2: UI CLASS (Merged)
@@ -251,6 +593,7 @@ class UnifiedMTCApp:
         self.do_chemical = tk.BooleanVar(value=True)
 
         self._init_ui()
+        self.root.after(50, self._drain_log)
 
     def _init_ui(self):
         # 1. Main Title
@@ -290,13 +633,19 @@ class UnifiedMTCApp:
         frm_log = tk.LabelFrame(self.root, text="Process Log", padx=5, pady=5)
         frm_log.pack(fill="both", expand=True, padx=15, pady=5)
         
-        self.txt_log = scrolledtext.ScrolledText(frm_log, height=12, state='disabled', font=("Consolas", 9))
+        self.txt_log = scrolledtext.ScrolledText(frm_log, height=12, font=("Consolas", 9))
         self.txt_log.pack(fill="both", expand=True)
+        # Read-only by swallowing keystrokes, so writes don't have to toggle the widget state
+        self.txt_log.bind("<Key>", self._block_log_edit)
+        # Mouse/menu edits (e.g. X11 middle-click paste) arrive as virtual events
+        for event in ("<<Paste>>", "<<PasteSelection>>", "<<Cut>>", "<<Clear>>"):
+            self.txt_log.bind(event, lambda e: "break")
         # Config tags for colors
         self.txt_log.tag_config("error", foreground="red")
         self.txt_log.tag_config("success", foreground="green")
         self.txt_log.tag_config("data", foreground="blue")
         self.txt_log.tag_config("info", foreground="black")
+        self.logger = LogHelper(self.txt_log, self.root)
 
         # 5. Progress Bar & Buttons
         self.lbl_status = tk.Label(self.root, text="Ready to start", anchor="w", fg="gray")
@@ -335,6 +684,11 @@ class UnifiedMTCApp:
         tk.Button(frame, text="Choose File", width=10, 
                   command=lambda: self._browse(variable, ftypes)).pack(side="left")
 
+    def _block_log_edit(self, event):
+        # Still allow Ctrl+C so log lines can be copied
+        if event.state & 0x4 and event.keysym.lower() == "c": return None
+        return "break"
+
     def _browse(self, variable, ftypes):
         f = filedialog.askopenfilename(filetypes=ftypes)
         if f: variable.set(f)
@@ -357,15 +711,13 @@ class UnifiedMTCApp:
 
         # 2. UI Lock
         self.progress['value'] = 0
-        self.txt_log.configure(state='normal')
         self.txt_log.delete(1.0, tk.END)
-        self.txt_log.configure(state='disabled')
         
         # 3. Threading
         threading.Thread(target=self._run_thread, args=(mtc_file,), daemon=True).start()
 
     def _run_thread(self, mtc_file):
-        logger = LogHelper(self.txt_log, self.root)
+        logger = self.logger
         logger.log("--- Starting Process ---")
 
         try:
@@ -373,10 +725,21 @@ class UnifiedMTCApp:
             if not os.path.exists(mtc_file):
                 logger.log(f"Destination file not found: {mtc_file}", "ERROR")
                 return
-            
+
+            # Destination writes are collected here and applied together before saving
+            updates = {}
+            chem_ok = self._run_chemical(updates, logger) if self.do_chemical.get() else True
+            mech_ok = self._run_mechanical(updates, logger) if self.do_mechanical.get() else True
+
+            # Leave the destination untouched unless every requested phase succeeded
+            if not (chem_ok and mech_ok):
+                logger.log("MTC Entry Sheet NOT updated: fix the errors above and run again.", "ERROR")
+                messagebox.showerror("Error", "Extraction failed. The MTC Entry Sheet was not modified.")
+                return
+
             # OPEN DESTINATION (Do this once!)
             logger.log("Opening MTC Destination file...")
-            self.update_prog(10, "Opening Workbook...")
+            self.update_prog(80, "Opening Workbook...")
             try:
                 wb_dest = openpyxl.load_workbook(mtc_file)
                 ws_dest = wb_dest.active
@@ -384,62 +747,9 @@ class UnifiedMTCApp:
                 logger.log("Error: File is Open. Please close Excel and try again.", "ERROR")
                 return
 
-            # --- PART A: CHEMICAL (SPECTRO) ---
-            if self.do_chemical.get():
-                spectro_file = self.path_spectro.get()
-                if spectro_file and os.path.exists(spectro_file):
-                    logger.log(f"Starting Chemical Transfer from: {os.path.basename(spectro_file)}")
-                    self.update_prog(20, "Processing Chemical Data...")
-                    
-                    try:
-                        wb_src = openpyxl.load_workbook(spectro_file, data_only=True)
-                        ws_src = wb_src.active
-                        
-                        count = 0
-                        for src_cell, dst_cell in SPECTRO_MAPPINGS:
-                            val = ws_src[src_cell].value
-                            ws_dest[dst_cell].value = val
-                            # Detailed debug in log
-                            # logger.log(f"  Transfer: {src_cell} ({val}) -> {dst_cell}") 
-                            count += 1
-                        logger.log(f"Chemical Data Transferred: {count} cells.", "SUCCESS")
-                    except Exception as e:
-                        logger.log(f"Error in Chemical Transfer: {e}", "ERROR")
-                else:
-                    logger.log("Skipping Chemical: File missing or not selected.", "info")
-
-            # --- PART B: MECHANICAL ---
-            if self.do_mechanical.get():
-                self.update_prog(40, "Processing Mechanical Inputs...")
-                
-                # 1. Micro structure
-                if self.path_micro.get():
-                    micro_res = extract_micro_data(self.path_micro.get(), logger)
-                    # Writing to Destination
-                    micro_map = {
-                        "Graphite Nodularity": 'T36', "Nodular Particles per mm²": 'T37',
-                        "Graphite Size": 'T38', "Graphite Form": 'T39',
-                        "Graphite Fraction": 'T40', "Ferrite / Pearlite Ratio": 'T41'
-                    }
-                    for k, cell in micro_map.items():
-                        if k in micro_res: ws_dest[cell] = micro_res[k]
-                
-                self.update_prog(60, "Processing Tensile/Hardness...")
-                
-                # 2. Tensile
-                if self.path_tensile.get():
-                    t_tens, t_yield, t_elong = process_tensile(self.path_tensile.get(), logger)
-                    if t_tens: ws_dest['E26'] = t_tens
-                    if t_yield: ws_dest['E27'] = t_yield
-                    if t_elong: ws_dest['E28'] = t_elong
-
-                # 3. Hardness
-                if self.path_hardness.get():
-                    hard_vals = process_hardness(self.path_hardness.get(), logger)
-                    if len(hard_vals) > 0: ws_dest['E29'] = hard_vals[0]
-                    if len(hard_vals) > 1: ws_dest['E30'] = hard_vals[1]
-
             # --- SAVE ---
+            for (row, col), val in updates.items():
+                ws_dest.cell(row=row, column=col).value = val
             logger.log("Saving MTC Entry Sheet...")
             self.update_prog(90, "Saving file...")
             wb_dest.save(mtc_file)
@@ -454,6 +764,77 @@ class UnifiedMTCApp:
         finally:
              self.root.after(0, lambda: self.lbl_status.configure(text="Ready"))
 
+    def _run_chemical(self, updates, logger):
+        """PART A: spectro values into `updates`. Returns False if the transfer failed."""
+        spectro_file = self.path_spectro.get()
+        if not spectro_file:
+            logger.log("Skipping Chemical: File not selected.", "info")
+            return True
+        if not os.path.exists(spectro_file):
+            logger.log(f"Spectro file not found: {spectro_file}", "ERROR")
+            return False
+
+        logger.log(f"Starting Chemical Transfer from: {os.path.basename(spectro_file)}")
+        self.update_prog(20, "Processing Chemical Data...")
+        try:
+            spectro_vals = read_spectro_values(spectro_file)
+            
+            count = 0
+            for (_, dst_rc), val in zip(_SPECTRO_RC, spectro_vals):
+                updates[dst_rc] = val
+                # Detailed debug in log
+                # logger.log(f"  Transfer: {dst_rc} <- {val}") 
+                count += 1
+            logger.log(f"Chemical Data Transferred: {count} cells.", "SUCCESS")
+            return True
+        except Exception as e:
+            logger.log(f"Error in Chemical Transfer: {e}", "ERROR")
+            return False
+
+    def _run_mechanical(self, updates, logger):
+        """PART B: micro/tensile/hardness values into `updates`. Returns False on failure."""
+        self.update_prog(40, "Processing Mechanical Inputs...")
+        
+        path_micro = self.path_micro.get()
+        path_tensile = self.path_tensile.get()
+        path_hardness = self.path_hardness.get()
+
+        try:
+            # Only the DOCX parse goes to a worker: PyMuPDF must not run on two threads
+            # at once, and the pdfminer fallback holds the GIL, so the PDFs are scanned in turn
+            with ThreadPoolExecutor(max_workers=1) as ex:
+                fut_micro = ex.submit(extract_micro_data, path_micro, logger) if path_micro else None
+
+                self.update_prog(60, "Processing Tensile/Hardness...")
+                
+                # 2. Tensile
+                if path_tensile:
+                    tensile_scan = scan_pdf(path_tensile, logger, "Tensile")
+                    for rc, val in zip(_TENSILE_RC, process_tensile(tensile_scan, logger)):
+                        if val: updates[rc] = val
+
+                # 3. Hardness
+                if path_hardness:
+                    hardness_scan = scan_pdf(path_hardness, logger, "Hardness")
+                    hard_vals = process_hardness(hardness_scan, logger)
+                    for rc, val in zip(_HARDNESS_RC, hard_vals):
+                        updates[rc] = val
+
+                # 1. Micro structure
+                if fut_micro:
+                    micro_res = fut_micro.result()
+                    # Writing to Destination
+                    for k, rc in _MICRO_RC.items():
+                        if k in micro_res: updates[rc] = micro_res[k]
+            return True
+        except Exception as e:
+            logger.log(f"Error in Mechanical Extraction: {e}", "ERROR")
+            return False
+
+    def _drain_log(self):
+        self.logger.drain()
+        self.root.after(50, self._drain_log)
+
     def update_prog(self, val, text):
         self.root.after(0, lambda: self._update_prog_ui(val, text))
 
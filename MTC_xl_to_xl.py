@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 import tkinter.ttk as ttk  # Import ttk for the modern Progress Bar
 import openpyxl
+from openpyxl.utils.cell import coordinate_to_tuple
 import os
 
 # --- Configuration: Mapping ---
@@ -109,8 +110,16 @@ class MTCTransferApp:
             self.update_progress(10, "Loading workbooks... Please wait.")
             
             # 1. Load Source (data_only=True gets the calculated value, not the formula)
-            wb_source = openpyxl.load_workbook(self.source_path, data_only=True)
-            ws_source = wb_source.active
+            # read_only streams the sheet; only the rows/cols we map from are read, in one pass
+            src_rc = [coordinate_to_tuple(src) for src, _ in CELL_MAPPINGS]
+            wb_source = openpyxl.load_workbook(self.source_path, data_only=True, read_only=True, keep_links=False)
+            try:
+                src_rows = list(wb_source.active.iter_rows(min_row=1,
+                                                           max_row=max(r for r, _ in src_rc),
+                                                           max_col=max(c for _, c in src_rc),
+                                                           values_only=True))
+            finally:
+                wb_source.close()
 
             # 2. Load Destination
             wb_dest = openpyxl.load_workbook(self.dest_path)
@@ -123,7 +132,9 @@ class MTCTransferApp:
             
             for i, (src_cell, dst_cell) in enumerate(CELL_MAPPINGS):
                 # Read
-                value = ws_source[src_cell].value
+                r, c = src_rc[i]
+                row = src_rows[r - 1] if r <= len(src_rows) else ()
+                value = row[c - 1] if c <= len(row) else None
                 # Write
                 ws_dest[dst_cell].value = value
                 